@@ -6,6 +6,33 @@ import numpy as np
 from bids.variables import BIDSRunVariableCollection
 from bids.utils import convert_JSON
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _dummies_to_vec_jit(dummies):  # pragma: no cover - requires numba
+        n, k = dummies.shape
+        out = np.zeros(n, dtype=np.int64)
+        for i in prange(n):
+            for j in range(k):
+                if dummies[i, j] == 1:
+                    out[i] = j + 1
+                    break
+        return out
+else:
+    _dummies_to_vec_jit = None
+
+# Element count above which the jitted kernel is worth the JIT warmup
+_JIT_SIZE_THRESHOLD = int(1e6)
+
 
 def create_model_spec(collection, model):
     kind = model.get('type', 'glm').lower()
@@ -57,10 +84,19 @@ s
         case of a gaussian (default family), an identity link is used.
     priors: dict
         Optional specification of default priors to use for new terms.
+    index_vecs: list
+        Optional list of precomputed integer index vectors, one per column
+        in groups, passed through to build_variance_components.
     """
     def __init__(self, terms=None, X=None, Z=None, groups=None, sigma=None,
-                 family=None, link=None, priors=None):
+                 family=None, link=None, priors=None, index_vecs=None):
         self.terms = {}
+        self._fixed = []
+        self._vc = []
+        self._partition_key = []
+        self._terms_version = 0
+        self._z_cache = None
+        self._z_cache_version = -1
         self.family = family
         self.link = link
         self.sigma = sigma
@@ -74,7 +110,8 @@ s
         if X is not None:
             self.build_fixed_terms(X)
         if Z is not None:
-            self.build_variance_components(Z, groups, sigma)
+            self.build_variance_components(Z, groups, sigma,
+                                           index_vecs=index_vecs)
 
     def set_priors(self, fixed=None, random=None):
         pass
@@ -89,14 +126,23 @@ s
             instances. Each column is converted to a different (fixed) Term,
             with the name taken from the column name.
         """
-        for col in X.columns:
-            data = X.loc[:, col].values
-            cat = data.dtype.name in ('str', 'category', 'object')
+        # dtype.kind covers object, string, and categorical columns without
+        # per-column dtype-name string comparisons.
+        cols = X.columns.tolist()
+        kinds = X.dtypes.map(lambda d: d.kind).to_numpy()
+        cat_mask = np.isin(kinds, ('O', 'U', 'S'))
+        # A single to_numpy() call is only safe when dtypes are homogeneous;
+        # on a mixed frame it would upcast every numeric column to object
+        values = X.to_numpy(copy=False) if X.dtypes.nunique() == 1 else None
+        for j, col in enumerate(cols):
+            data = (values[:, j] if values is not None
+                    else X.iloc[:, j].to_numpy(copy=False))
             # TODO: get default prior
-            t = Term(col, data, categorical=cat)
+            t = Term(col, data, categorical=bool(cat_mask[j]))
             self.add_term(t)
 
-    def build_variance_components(self, Z, groups=None, sigma=None, names=None):
+    def build_variance_components(self, Z, groups=None, sigma=None, names=None,
+                                  index_vecs=None):
         """Build one or more variance components from the columns of a binary
         grouping matrix and variance specification.
 
@@ -110,24 +156,41 @@ s
                 a single group over all columns of Z is assumed.
             sigma (2DArray): A k x k 2D covariance matrix specifying the
                 covariances between variance components.
-            names (list): Optional list specifying the names of the groups. 
+            names (list): Optional list specifying the names of the groups.
+            index_vecs (list): Optional list of precomputed integer index
+                vectors (one per group, in column order of groups; entries
+                may be None), used to seed each VarComp's index_vec and
+                skip the dummy-to-index conversion.
         """
         if groups is None:
-            groups = np.ones((Z.shape[1], 1))
+            # Indicator matrix; int8 keeps it 8x smaller than float64
+            groups = np.ones((Z.shape[1], 1), dtype=np.int8)
         n_grps = groups.shape[1]
 
         if names is None:
-            names = getattr(groups, 'columns',
-                            ['VC{}'.format(i) for i in range(n_grps)])
+            # Only build the fallback names when actually needed; getattr
+            # with a default would evaluate the list eagerly
+            if hasattr(groups, 'columns'):
+                names = groups.columns.tolist()
+            else:
+                names = ['VC{}'.format(i) for i in range(n_grps)]
 
         # Work with array instead of DF
         if hasattr(groups, 'values'):
             groups = groups.values
 
         for i in range(n_grps):
-            z_grp = Z[:, groups[:, i].astype(bool)]
+            cols = np.flatnonzero(groups[:, i])
+            # Groups built by from_collection are block-diagonal, so each
+            # group's columns are contiguous and can be sliced as a view
+            # rather than copied via fancy indexing
+            if cols.size and cols[-1] - cols[0] + 1 == cols.size:
+                z_grp = Z[:, cols[0]:(cols[-1] + 1)]
+            else:
+                z_grp = Z[:, cols]
+            index_vec = index_vecs[i] if index_vecs is not None else None
             # TODO: select default prior
-            vc = VarComp(names[i], z_grp)
+            vc = VarComp(names[i], z_grp, index_vec=index_vec)
             self.add_term(vc)
 
     def add_term(self, term):
@@ -142,37 +205,92 @@ s
             raise ValueError("Term with name {} already exists!"
                              .format(term.name))
         self.terms[term.name] = term
+        # Partition terms at insertion so X/Z don't rescan the full dict
+        if isinstance(term, VarComp):
+            self._vc.append(term)
+        else:
+            self._fixed.append(term)
+        self._partition_key.append(term)
+        self._terms_version += 1
 
     @property
     def X(self):
         """Return X design matrix (i.e., fixed component of model)."""
-        if not self.fixed_terms:
+        terms = self.fixed_terms
+        if not terms:
             return None
-        names, cols = zip(*[(c.name, c.values) for c in self.fixed_terms])
-        return pd.DataFrame(np.c_[cols], columns=names)
+        names = [t.name for t in terms]
+        n = len(terms[0].values)
+        # Fill a single preallocated array rather than concatenating columns;
+        # categorical terms force an object array to preserve labels.
+        dtype = object if any(t.categorical for t in terms) else np.float64
+        out = np.empty((n, len(terms)), dtype=dtype)
+        for j, t in enumerate(terms):
+            out[:, j] = np.asarray(t.values).ravel()
+        return pd.DataFrame(out, columns=names, copy=False)
 
     @property
     def Z(self):
         """Return Z design matrix (i.e., random effects/variance components).
         """
-        if not self.variance_components:
+        # Memoize on the term version counter; rebuilding the DataFrame (and
+        # its column names) on every access is wasteful for wide Z matrices.
+        # Accessing variance_components re-syncs the partition, so direct
+        # mutation of self.terms also invalidates the cache.
+        vcs = self.variance_components
+        if self._z_cache_version != self._terms_version:
+            if not vcs:
+                result = None
+            else:
+                n = vcs[0].values.shape[0]
+                n_cols = sum(c.values.shape[1] for c in vcs)
+                out = np.empty((n, n_cols), dtype=np.float64)
+                names = []
+                start = 0
+                for c in vcs:
+                    k = c.values.shape[1]
+                    out[:, start:(start + k)] = c.values
+                    names.extend(['{}.{}'.format(c.name, i)
+                                  for i in range(k)])
+                    start += k
+                result = pd.DataFrame(out, columns=names, copy=False)
+            self._z_cache = result
+            self._z_cache_version = self._terms_version
+        if self._z_cache is None:
             return None
-        names, cols = [], []
-        for c in self.variance_components:
-            cols.append(c.values)
-            names.extend(['{}.{}'.format(c.name, i)
-                          for i in range(c.values.shape[1])])
-        return pd.DataFrame(np.concatenate(cols, axis=1), columns=names)
+        # Return a copy so caller mutations can't corrupt the cache
+        return self._z_cache.copy()
+
+    def _partition(self):
+        """Partition self.terms into fixed terms and variance components in
+        a single pass. The result is memoized on the dict's contents, so
+        any mutation of self.terms — including deletion or same-length
+        replacement of a term — is picked up on the next access.
+        """
+        terms = list(self.terms.values())
+        # List comparison is an identity check per term: cheap, and exactly
+        # the granularity needed to detect replacements
+        if terms != self._partition_key:
+            fixed, vcs = [], []
+            for t in terms:
+                # type() rather than isinstance(): VarComp has no
+                # subclasses, and this skips the MRO walk in a per-term loop
+                (vcs if type(t) is VarComp else fixed).append(t)
+            self._fixed, self._vc = fixed, vcs
+            self._partition_key = terms
+            # Bump the version so memoized products (e.g., Z) are rebuilt
+            self._terms_version += 1
+        return self._fixed, self._vc
 
     @property
     def fixed_terms(self):
         """Return a list of all available fixed effects."""
-        return [t for t in self.terms.values() if not isinstance(t, VarComp)]
+        return self._partition()[0]
 
     @property
     def variance_components(self):
         """Return a list of all available variance components."""
-        return [t for t in self.terms.values() if isinstance(t, VarComp)]
+        return self._partition()[1]
 
     @classmethod
     def from_collection(cls, collection, model):
@@ -209,29 +327,66 @@ s
         # Variance components
         vcs = model.get('variance_components', [])
         Z_list = []
+        index_vecs = []
         if vcs:
+            # Resolve all level-variable names up front so a single to_df
+            # call can serve every component that needs one
+            vc_names = []
+            all_names = []
             for vc in vcs:
+                names = (collection.match_variables(vc['levels'])
+                         if 'levels_from' not in vc else None)
+                vc_names.append(names)
+                if names:
+                    all_names.extend(names)
+
+            if all_names:
+                all_names = list(dict.fromkeys(all_names))
+                big_df = collection.to_df(all_names)
+                col_pos = {c: i for i, c in enumerate(big_df.columns)}
+                big_arr = big_df.to_numpy(copy=False)
+
+            for vc, names in zip(vcs, vc_names):
                 # Levels can either be defined by the levels of a single
                 # categorical ("LevelsFrom") or by a set of binary variables.
-                if 'levels_from' in vc:
+                if names is None:
                     data = collection.variables[vc['levels_from']].values
-                    Z_list.append(pd.get_dummies(data).values)
+                    # One-hot encode from integer codes directly; avoids the
+                    # dense float matrix pd.get_dummies would allocate
+                    codes, uniques = pd.factorize(np.asarray(data).ravel(),
+                                                  sort=True)
+                    Z_block = np.zeros((codes.size, uniques.size),
+                                       dtype=np.int8)
+                    valid = codes >= 0
+                    Z_block[np.flatnonzero(valid), codes[valid]] = 1
+                    Z_list.append(Z_block)
+                    # codes are 0-based with -1 for missing, so codes + 1
+                    # is exactly the 1-based index_vec convention; seeding
+                    # it skips the dummy-to-index scan in VarComp
+                    index_vecs.append(codes + 1)
                 else:
-                    names = collection.match_variables(vc['levels'])
-                    df = collection.to_df(names).loc[:, names]
-                    Z_list.append(df.values)
-
-            Z = np.concatenate(Z_list, axis=1)
-            groups = np.zeros((Z.shape[1], len(Z_list)))
-            c = 0
-            for i, vc in enumerate(Z_list):
-                n = vc.shape[1]
-                groups[c:(c+n), i] = 1
-                c += n
+                    Z_list.append(big_arr[:, [col_pos[n] for n in names]])
+                    index_vecs.append(None)
+
+            # Fill a preallocated Z and build the block-diagonal indicator
+            # matrix in single C-level passes rather than per-component loops
+            sizes = np.fromiter((blk.shape[1] for blk in Z_list),
+                                dtype=np.intp)
+            n_cols = int(sizes.sum())
+            Z = np.empty((Z_list[0].shape[0], n_cols), dtype=np.float64)
+            start = 0
+            for blk in Z_list:
+                stop = start + blk.shape[1]
+                Z[:, start:stop] = blk
+                start = stop
+            group_ids = np.repeat(np.arange(len(Z_list)), sizes)
+            groups = np.zeros((n_cols, len(Z_list)), dtype=np.int8)
+            groups[np.arange(n_cols), group_ids] = 1
             groups = pd.DataFrame(groups, columns=[vc['name'] for vc in vcs])
 
             kwargs['Z'] = Z
             kwargs['groups'] = groups
+            kwargs['index_vecs'] = index_vecs
 
         error = model.get('error')
         if error:
@@ -257,13 +412,27 @@ class Term(object):
     metadata : dict
         Arbitrary metadata to store internally.
     """
+    __slots__ = ('name', 'values', 'categorical', 'prior', '_metadata')
+
     def __init__(self, name, values, categorical=False, prior=None,
                  metadata=None):
         self.name = name
         self.values = values
         self.categorical = categorical
         self.prior = prior
-        self.metadata = metadata or {}
+        self._metadata = metadata
+
+    @property
+    def metadata(self):
+        # Allocated lazily so terms created in tight loops don't each pay
+        # for an empty dict
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value):
+        self._metadata = value
 
 
 class VarComp(Term):
@@ -282,11 +451,26 @@ class VarComp(Term):
         Optional specification of the prior distribution for the VarComp.
     metadata : dict
         Arbitrary metadata to store internally.
+    index_vec : NDArray
+        Optional 1d array of integer level indices (1-based, with 0 for
+        unassigned rows) matching the columns of values. If None, it is
+        computed lazily from values on first access.
     """
-    def __init__(self, name, values, prior=None, metadata=None):
+    __slots__ = ('_index_vec',)
+
+    def __init__(self, name, values, prior=None, metadata=None,
+                 index_vec=None):
         super(VarComp, self).__init__(name, values, categorical=True,
                                       prior=prior, metadata=metadata)
-        self.index_vec = self.dummies_to_vec(values)
+        self._index_vec = index_vec
+
+    @property
+    def index_vec(self):
+        # Computed on first access, so backends that only need the dummy
+        # form never pay for the full conversion pass
+        if self._index_vec is None:
+            self._index_vec = self.dummies_to_vec(self.values)
+        return self._index_vec
 
     @staticmethod
     def dummies_to_vec(dummies):
@@ -304,9 +488,27 @@ class VarComp(Term):
         process and represent full-rank dummies as a vector of indices into the
         coefficients.
         """
-        vec = np.zeros(len(dummies), dtype=int)
-        for i in range(dummies.shape[1]):
-            vec[(dummies[:, i] == 1)] = i + 1
+        dummies = np.asarray(dummies)
+        # A zero-column matrix has no levels; argmax would raise
+        if dummies.shape[1] == 0:
+            return np.zeros(len(dummies), dtype=np.int64)
+        # For very large matrices, a jitted single-pass kernel avoids the
+        # intermediates the vectorized path allocates
+        if (_dummies_to_vec_jit is not None
+                and dummies.size > _JIT_SIZE_THRESHOLD):
+            return _dummies_to_vec_jit(dummies)
+        if ne is not None and dummies.size > _JIT_SIZE_THRESHOLD:
+            # The weighted-row-sum trick is only valid for one-hot rows; a
+            # row with several set indicators would sum its column indices
+            # instead of taking the first, so fall through to argmax in
+            # that case. numexpr fuses the multiply and the reduction into
+            # one blocked, multithreaded pass.
+            if dummies.sum(axis=1).max() <= 1:
+                idx = np.arange(1, dummies.shape[1] + 1, dtype=np.int64)
+                return ne.evaluate('sum(dummies * idx, axis=1)')
+        vec = (dummies.argmax(axis=1) + 1).astype(np.int64)
+        # Rows with no active level map to 0
+        vec[dummies.sum(axis=1) == 0] = 0
         return vec
 
 
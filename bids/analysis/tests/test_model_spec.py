@@ -52,6 +52,16 @@ def test_glmmspec_empty_init():
     assert md.sigma is None
 
 
+def test_build_fixed_terms_mixed_dtypes():
+    X = pd.DataFrame({'RT': np.random.normal(size=8),
+                      'trial_type': ['a', 'b'] * 4})
+    md = GLMMSpec(X=X)
+    # Numeric columns must keep their native dtype in mixed frames
+    assert md.terms['RT'].values.dtype == np.float64
+    assert not md.terms['RT'].categorical
+    assert md.terms['trial_type'].categorical
+
+
 def test_fixed_term_init():
     t = Term('dummy', np.random.normal(size=20), categorical=True)
     assert t.name == 'dummy'
@@ -65,3 +75,48 @@ def test_var_comp_init():
     assert t.name == 'sigma'
     assert t.values.shape == (100, 20)
     assert t.categorical
+
+
+def test_dummies_to_vec_unassigned_rows():
+    dummies = np.array([[1, 0], [0, 1], [0, 0], [0, 1]])
+    vec = VarComp.dummies_to_vec(dummies)
+    # Rows with no active level map to 0; others get 1-based level indices
+    assert np.array_equal(vec, [1, 2, 0, 2])
+    # A zero-column matrix maps every row to 0
+    assert np.array_equal(VarComp.dummies_to_vec(np.zeros((3, 0))),
+                          np.zeros(3))
+
+
+def test_dummies_to_vec_accelerated_paths_agree(monkeypatch):
+    from bids.analysis import model_spec
+    rng = np.random.RandomState(17)
+    dummies = np.zeros((30, 5), dtype=np.int8)
+    levels = rng.randint(-1, 5, size=30)
+    rows = np.flatnonzero(levels >= 0)
+    dummies[rows, levels[rows]] = 1
+    # Include a multi-hot row to exercise the first-set-column semantics
+    dummies[0] = 1
+    expected = VarComp.dummies_to_vec(dummies)
+    assert expected[0] == 1
+    # Force the accelerated branches to run on the small input
+    monkeypatch.setattr(model_spec, '_JIT_SIZE_THRESHOLD', 0)
+    if model_spec._dummies_to_vec_jit is not None:
+        assert np.array_equal(VarComp.dummies_to_vec(dummies), expected)
+    monkeypatch.setattr(model_spec, '_dummies_to_vec_jit', None)
+    # With or without numexpr, the result must match the plain NumPy path
+    assert np.array_equal(VarComp.dummies_to_vec(dummies), expected)
+    if model_spec.ne is not None:
+        one_hot = np.eye(6, dtype=np.int8)[rng.randint(6, size=30)]
+        assert np.array_equal(VarComp.dummies_to_vec(one_hot),
+                              one_hot.argmax(axis=1) + 1)
+
+
+def test_var_comp_index_vec_seeding():
+    Z = np.repeat(np.eye(4), 5, axis=0)
+    seeded = np.repeat(np.arange(4) + 1, 5)
+    t = VarComp('sigma', Z, index_vec=seeded)
+    # The seeded vector is returned as-is, without a dummy-to-index scan
+    assert t.index_vec is seeded
+    # When not seeded, index_vec is computed lazily from values
+    t = VarComp('sigma', Z)
+    assert np.array_equal(t.index_vec, np.repeat(np.arange(4) + 1, 5))
@@ -1,4 +1,5 @@
 # from bids.analysis.variables import load_variables
+from bids.analysis import TransformerManager
 from bids.analysis import transformations as transform
 from bids.variables import SparseRunVariable
 from bids.variables.entities import RunInfo
@@ -542,3 +543,34 @@ def test_resample(collection):
     # Assert that the auc is more or less the same (not exact, rounding error)
     # Values are around 0.25
     assert np.allclose(old_auc, new_auc, rtol=0.05)
+
+
+def test_transformer_manager_calls_registered_handler():
+    tm = TransformerManager()
+    handler = mock.Mock()
+    tm.register('Custom', handler)
+    collection = mock.Mock()
+    result = tm.transform(collection, [{'Name': 'Custom', 'Input': ['a'],
+                                        'Demean': True}])
+    handler.assert_called_once_with(collection, ['a'], demean=True)
+    assert result is collection
+
+
+def test_transformer_manager_register_overrides_cached_default():
+    tm = TransformerManager()
+    collection = mock.Mock()
+    # Resolve (and cache) the default-module handler first
+    with mock.patch.object(tm.default, 'Scale') as default_func:
+        tm.transform(collection, [{'Name': 'Scale', 'Input': ['a']}])
+        default_func.assert_called_once_with(collection, ['a'])
+    # Registering a handler must override the cached default resolution
+    handler = mock.Mock()
+    tm.register('Scale', handler)
+    tm.transform(collection, [{'Name': 'Scale', 'Input': ['a']}])
+    handler.assert_called_once_with(collection, ['a'])
+
+
+def test_transformer_manager_missing_transformation():
+    tm = TransformerManager()
+    with pytest.raises(ValueError, match='NoSuchTransformation'):
+        tm.transform(mock.Mock(), [{'Name': 'NoSuchTransformation'}])
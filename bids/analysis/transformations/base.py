@@ -385,6 +385,13 @@ class Transformation(metaclass=ABCMeta):
             _align(listify(variables) + _aligned_variables)
 
 
+# Transformation names that clash with Python keywords
+_TRANSFORMATION_ALIASES = {'And': 'And_', 'Or': 'Or_'}
+
+# Spec keys consumed by the manager itself rather than passed to handlers
+_NON_KWARG_KEYS = frozenset({'name', 'input'})
+
+
 class TransformerManager(object):
     """Handles registration and application of transformations to
     BIDSVariableCollections.
@@ -400,6 +407,7 @@ class TransformerManager(object):
 
     def __init__(self, default=None):
         self.transformations = {}
+        self._resolved = {}
         if default is None:
             # Default to PyBIDS transformations
             default = pbt
@@ -414,9 +422,7 @@ class TransformerManager(object):
         name: str
             The name of the transformation to sanitize.
         """
-        if name in ('And', 'Or'):
-            name += '_'
-        return name
+        return _TRANSFORMATION_ALIASES.get(name, name)
 
     def register(self, name, func):
         """Register a new transformation handler.
@@ -430,6 +436,7 @@ class TransformerManager(object):
         """
         name = self._sanitize_name(name)
         self.transformations[name] = func
+        self._resolved.pop(name, None)
 
     def transform(self, collection, transformations):
         """Apply all transformations to the variables in the collection.
@@ -443,17 +450,22 @@ class TransformerManager(object):
         """
         for t in transformations:
             t = convert_JSON(t) # make sure all keys are snake case
-            kwargs = dict(t)
-            name = self._sanitize_name(kwargs.pop('name'))
-            cols = kwargs.pop('input', None)
-
-            # Check registered transformations; fall back on default module
-            func = self.transformations.get(name, None)
+            name = self._sanitize_name(t['name'])
+            cols = t.get('input')
+            kwargs = {k: v for k, v in t.items() if k not in _NON_KWARG_KEYS}
+
+            # Check registered transformations; fall back on default module.
+            # Resolved handlers are cached so repeated transformations don't
+            # pay the getattr lookup each time.
+            func = self._resolved.get(name)
             if func is None:
-                if not hasattr(self.default, name):
+                func = self.transformations.get(name)
+                if func is None:
+                    func = getattr(self.default, name, None)
+                if func is None:
                     raise ValueError("No transformation '%s' found: either "
                                      "explicitly register a handler, or pass a"
                                      " default module that supports it." % name)
-                func = getattr(self.default, name)
-                func(collection, cols, **kwargs)
+                self._resolved[name] = func
+            func(collection, cols, **kwargs)
         return collection